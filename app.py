@@ -1,13 +1,25 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import numpy as np
 import collections
+import functools
+import hashlib
+import json
+import os
+import re
 import traceback 
 import requests
 import folium
 from streamlit_folium import st_folium
-import reverse_geocode 
+import streamlit.components.v1 as components
+
+try:
+    import orjson  # Optional: faster C parser for the world GeoJSON.
+except ImportError:
+    orjson = None
 
 # --- 0. CUSTOM CSS INJECTION FOR STYLING ---
 CUSTOM_CSS = """
@@ -35,6 +47,27 @@ div.st-emotion-cache-16k74f6 > iframe {
 # -----------------------------
 
 WORLD_GEOJSON_URL = 'https://raw.githubusercontent.com/johan/world.geo.json/master/countries.geo.json'
+WORLD_GEOJSON_PATH = 'countries.geo.json'
+# Downloaded copy (gitignored), so a fallback download never overwrites the bundled file.
+WORLD_GEOJSON_CACHE_PATH = 'world.geo.json'
+
+# ~11 m at the equator: well below one pixel at the zoom levels the map is used at.
+GEOJSON_COORD_DECIMALS = 4
+
+DATA_CSV_PATH = "final_with_socio_cleaned.csv"
+# Holds the CSV after header/whitespace normalization (see read_indicator_table).
+DATA_PARQUET_PATH = "final_with_socio_cleaned.normalized.parquet"
+
+# Aggregate rows (regions, income groups, ...) are dropped when their name contains any of these terms.
+EXCLUDE_TERMS = [
+    "AFRICA", "ASIA", "LATIN AMERICA", "CARIBBEAN", "MIDDLE EAST",
+    "HIGH INCOME", "LOW INCOME", "IDA", "IBRD", "UNION", "WORLD", "TOTAL",
+    "DEVELOPING", "EASTERN", "WESTERN", "CENTRAL", "PACIFIC", "ARAB", "OECD", 
+    "LESS DEVELOPED", "MORE DEVELOPED", "EURO AREA", "UN", "FORMER", "REPUBLIC OF YEMEN",
+    "REGIONS", "DEMOGRAPHIC DIVIDEND", "SMALL STATES", "LAND-LOCKED", "NORTH AMERICA", "ANDORRA"
+]
+# Compiled once so the aggregate filter is a single scan; it runs on upper-cased names, so no case folding is needed.
+EXCLUDE_RE = re.compile("|".join(re.escape(term) for term in EXCLUDE_TERMS))
 
 INDICATOR_COLORS = {
     "HDI": "#1f77b4", "LIFE_EXPECTANCY": "#ff7f0e", "GDP_PER_CAPITA": "#2ca02c",
@@ -59,10 +92,35 @@ ALL_INDICATOR_DETAILS = collections.OrderedDict([
     ("FEMALE_POPULATION", {"display": "Female Population", "unit": "M", "precision": 1}),
 ])
 
+# Columns the dashboard reads (matched case-insensitively against the CSV header); anything else is skipped at parse time.
+DATA_COLUMNS = frozenset(["COUNTRY", "ISO3", "YEAR", *ALL_INDICATOR_DETAILS])
+
+# Stored in the Parquet cache's metadata; a cache written under another key is rebuilt. The column set is part of the
+# key, so changing DATA_COLUMNS invalidates old caches on its own; bump the version when read_indicator_table's cleaning changes.
+DATA_CACHE_VERSION = 1
+DATA_CACHE_KEY = f"v{DATA_CACHE_VERSION}:{','.join(sorted(DATA_COLUMNS))}"
+
 CHART_INDICATORS = {
     "HDI": "HDI", "Life Expectancy": "LIFE_EXPECTANCY", "GDP per Capita": "GDP_PER_CAPITA",
     "Gini Index": "GINI_INDEX", "Population Density": "POPULATION_DENSITY", "COVID Deaths / mil": "COVID_DEATHS" 
 }
+# Explanations shown under each indicator in the data narrative; indicators without an entry get no explanation.
+INDICATOR_CONTEXT = {
+    "HDI": "The **Human Development Index (HDI)** measures a country's average achievement in three basic dimensions of human development: a long and healthy life, knowledge, and a decent standard of living.",
+    "GDP_PER_CAPITA": "The **Gross Domestic Product (GDP) per Capita** is the national economic output divided by the total population, indicating average economic prosperity.",
+    "GINI_INDEX": "The **Gini Index** measures income inequality, where 0% represents perfect equality and 100% represents perfect inequality.",
+    "TOTAL_POPULATION": "The total number of people living in the country (reported in Millions).",
+    "POPULATION_DENSITY": "The average number of people per square kilometer, showing how crowded the country is.",
+    "MEDIAN_AGE_EST": "The age that divides the population into two halves. A lower median age suggests a younger population.",
+    "LIFE_EXPECTANCY": "The average number of years a person is expected to live based on current death rates.",
+    "HEALTH_INSURANCE": "The percentage of the total population covered by some form of health insurance.",
+    "PM25": "The concentration of fine particulate matter in the air, a key indicator of environmental health risk.",
+    "BIRTHS": "The total number of births during the year (reported in thousands, K).",
+    "DEATHS": "The total number of deaths during the year (reported in thousands, K).",
+    "COVID_DEATHS": "The cumulative total of COVID-19 deaths per million people up to this year.",
+    "COVID_CASES": "The cumulative total of confirmed COVID-19 cases per million people up to this year.",
+}
+
 # KPI color is set to white/ivory for contrast against black
 KPI_VALUE_COLOR = "#FFFFF0" 
 
@@ -91,20 +149,33 @@ def select_box_callback(country_name_to_iso):
         st.session_state.selected_id = None
 
 
-@st.cache_data
+def read_indicator_table():
+    """Reads the normalized indicator table from its Parquet cache, rebuilding the cache from the CSV when stale."""
+    if os.path.exists(DATA_PARQUET_PATH) and os.path.getmtime(DATA_PARQUET_PATH) >= os.path.getmtime(DATA_CSV_PATH):
+        cached = pd.read_parquet(DATA_PARQUET_PATH)
+        if cached.attrs.get("cache_key") == DATA_CACHE_KEY:
+            return cached
+
+    df = pd.read_csv(DATA_CSV_PATH, usecols=lambda col: col.upper() in DATA_COLUMNS)
+    df.columns = df.columns.str.upper()
+    df["ISO3"] = df["ISO3"].str.strip()
+    df["COUNTRY"] = df["COUNTRY"].str.strip()
+    df.attrs["cache_key"] = DATA_CACHE_KEY  # Written into the Parquet metadata alongside the frame.
+    try:
+        tmp_path = DATA_PARQUET_PATH + ".tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, DATA_PARQUET_PATH)
+    except (ImportError, OSError):
+        pass  # The cache only speeds up cold starts; without pyarrow or a writable directory the CSV is used.
+    return df
+
+
+@st.cache_resource(show_spinner=False)
 def load_data():
-    """Loads data, GeoJSON, the Mismatch Map, and the Hex Colors, and applies filtering/cleaning.
+    """Loads data, the Mismatch Map, and the Hex Colors, and applies filtering/cleaning.
     *** CRITICAL: This section is updated with final country mappings. ***
     """
     
-    EXCLUDE_TERMS = [
-        "AFRICA", "ASIA", "LATIN AMERICA", "CARIBBEAN", "MIDDLE EAST",
-        "HIGH INCOME", "LOW INCOME", "IDA", "IBRD", "UNION", "WORLD", "TOTAL",
-        "DEVELOPING", "EASTERN", "WESTERN", "CENTRAL", "PACIFIC", "ARAB", "OECD", 
-        "LESS DEVELOPED", "MORE DEVELOPED", "EURO AREA", "UN", "FORMER", "REPUBLIC OF YEMEN",
-        "REGIONS", "DEMOGRAPHIC DIVIDEND", "SMALL STATES", "LAND-LOCKED", "NORTH AMERICA", "ANDORRA"
-    ]
-    
     SPECIFIC_EXCLUSIONS = [
         "CZECHOSLOVAKIA", "WEST BENGAL", "HOLY SEE", 
         "BRITISH VIRGIN ISLANDS", "CAYMAN ISLANDS", "FALKLAND ISLANDS", "GIBRALTAR", 
@@ -142,8 +213,11 @@ def load_data():
     ]
 
     try:
-        df = pd.read_csv("final_with_socio_cleaned.csv")
-        mismatch_df = pd.read_csv("country_name_mismatch_map.csv")
+        df = read_indicator_table()
+        # The mismatch map is hand-edited: "#" lines are section headers, not data rows.
+        mismatch_df = pd.read_csv(
+            "country_name_mismatch_map.csv", usecols=['ISO3', 'GEOJSON_NAME'], dtype=str, comment='#'
+        )
         
         hex_df = pd.read_csv("Hex.csv", usecols=['iso_alpha', 'hex'], dtype={'iso_alpha': str, 'hex': str})
         hex_df.columns = ['ISO3', 'HEX_CODE']
@@ -156,41 +230,220 @@ def load_data():
         st.error(f"FATAL ERROR: CSV parsing issue: {e}. Check files.")
         st.stop()
 
-        
-    df.columns = [col.upper() for col in df.columns] 
-    df["YEAR"] = df["YEAR"].astype(int)
-    df["ISO3"] = df["ISO3"].str.strip()
-    df["COUNTRY"] = df["COUNTRY"].str.strip()
 
     df['ORIGINAL_COUNTRY'] = df['COUNTRY'] 
-    for iso, correct_name in RENAME_ISO_TO_COUNTRY.items():
-        df.loc[df['ISO3'] == iso, 'COUNTRY'] = correct_name
+    # One hash lookup per row for the ISO renames; the "Americas" aggregate gets its proxy label in the same pass.
+    df['COUNTRY'] = (
+        df['ISO3'].map(RENAME_ISO_TO_COUNTRY)
+        .fillna(df['COUNTRY'])
+        .replace({"Americas": "Americas (USA Data Proxy)"})
+    )
 
-    df_filtered = df.copy()
-    must_keep_isos = df_filtered['ISO3'].isin(RENAME_ISO_TO_COUNTRY.keys())
-    must_keep_names = df_filtered["ORIGINAL_COUNTRY"].isin(MUST_KEEP_AGGREGATES)
+    must_keep_isos = df['ISO3'].isin(RENAME_ISO_TO_COUNTRY.keys())
+    must_keep_names = df["ORIGINAL_COUNTRY"].isin(MUST_KEEP_AGGREGATES)
     
-    is_specific_exclusion = df_filtered["ORIGINAL_COUNTRY"].str.upper().isin([s.upper() for s in SPECIFIC_EXCLUSIONS])
+    # Upper-cased once and shared by both name checks; the exclusion lists are already upper case.
+    upper_names = df["ORIGINAL_COUNTRY"].str.upper()
+    is_specific_exclusion = upper_names.isin(SPECIFIC_EXCLUSIONS)
     
-    is_aggregate = pd.Series(False, index=df_filtered.index)
-    for term in EXCLUDE_TERMS:
-        is_aggregate = is_aggregate | df_filtered["ORIGINAL_COUNTRY"].str.contains(term, case=False, na=False)
+    is_aggregate = upper_names.str.contains(EXCLUDE_RE, na=False)
     rows_to_keep = (must_keep_isos) | (must_keep_names) | (~is_aggregate & ~is_specific_exclusion)
-    df = df_filtered[rows_to_keep].copy()
-    df.loc[df['COUNTRY'] == "Americas", 'COUNTRY'] = "Americas (USA Data Proxy)"
-    df.drop(columns=['ORIGINAL_COUNTRY'], inplace=True) 
+    # Masks are built against df itself and the filtered result rebinds it, so no intermediate copies are needed.
+    df = df.loc[rows_to_keep].drop(columns=['ORIGINAL_COUNTRY'])
+
+    # CANON_ID: one lookup key per row -- the ISO3 code, or the country name for rows without one (proxies, regions).
+    df["CANON_ID"] = df["ISO3"].fillna(df["COUNTRY"])
+
+    # Compact dtypes: ISO3/COUNTRY repeat once per year, so categories make equality and isin checks compare integer codes.
+    # Indicators stay float64: they are formatted straight into KPIs and narratives, and float32 would change shown figures.
+    df = df.astype({"YEAR": "int16", "ISO3": "category", "COUNTRY": "category", "CANON_ID": "category"})
 
     # 2. mismatch_map: Maps GeoJSON country name (clicked on map) to a proxy ISO3 code for data lookup.
     mismatch_map = dict(zip(mismatch_df["GEOJSON_NAME"], mismatch_df["ISO3"]))
+
+    # 3. iso_set: O(1) validation of ISO3 codes coming back from map clicks.
+    iso_set = frozenset(df["ISO3"].dropna().unique())
+
+    # 4. country_list / country_name_to_iso: Select-box options and the name -> CANON_ID lookup behind them.
+    # Every category is observed after filtering, so the categories are exactly the unique country names.
+    country_list = sorted(df["COUNTRY"].cat.categories)
+    country_name_to_iso = dict(zip(df["COUNTRY"], df["CANON_ID"]))
+
+    # 5. years: Sorted distinct years for the slider bounds.
+    years = sorted(df["YEAR"].unique().tolist())
+
+    # 6. data_version: Content hash of the cleaned frame, passed as the hashed key of every cache derived from df.
+    data_version = hashlib.sha1(pd.util.hash_pandas_object(df).to_numpy().tobytes()).hexdigest()
     
-    try:
-        response = requests.get(WORLD_GEOJSON_URL)
-        world_geojson = response.json()
-    except Exception as e:
-        st.warning(f"Failed to load world GeoJSON for map coloring: {e}")
-        world_geojson = None
-    
-    return df, world_geojson, mismatch_map, iso_to_hex
+    return df, mismatch_map, iso_to_hex, iso_set, country_list, country_name_to_iso, years, data_version
+
+
+def parse_json(raw):
+    """Parses JSON bytes with orjson when installed, falling back to the standard library."""
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def round_coordinates(coords, ndigits=GEOJSON_COORD_DECIMALS):
+    """Recursively rounds a GeoJSON coordinate array to ndigits decimals. Empty arrays are returned empty."""
+    if not coords or isinstance(coords[0], (int, float)):
+        return [round(c, ndigits) for c in coords]
+    return [round_coordinates(c, ndigits) for c in coords]
+
+
+def slim_geojson(geojson, iso_to_hex):
+    """Reduces each feature to its id, name, fill color and rounded geometry; null geometries pass through."""
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "id": feature.get("id"),
+                "properties": {
+                    "name": (feature.get("properties") or {}).get("name"),
+                    "fill_color": iso_to_hex.get(feature.get("id"), '#666666'),
+                },
+                "geometry": None if feature.get("geometry") is None else {
+                    "type": feature["geometry"]["type"],
+                    "coordinates": round_coordinates(feature["geometry"]["coordinates"]),
+                },
+            }
+            for feature in geojson["features"]
+        ],
+    }
+
+
+@st.cache_resource(show_spinner=False, ttl=86400)
+def load_world_geojson(iso_to_hex):
+    """Loads the world GeoJSON and returns (world_geojson, click-lookup shapes, hash of the source file)."""
+    world_geojson = None
+    for path in (WORLD_GEOJSON_CACHE_PATH, WORLD_GEOJSON_PATH):
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            world_geojson = slim_geojson(parse_json(raw), iso_to_hex)
+            break
+        except (FileNotFoundError, ValueError):
+            pass  # Missing, or truncated/corrupt: try the next copy, then the network.
+
+    if world_geojson is None:
+        # A failed download raises, so nothing is cached and the next rerun retries.
+        response = requests.get(WORLD_GEOJSON_URL, timeout=10)
+        response.raise_for_status()
+        raw = response.content
+        world_geojson = slim_geojson(parse_json(raw), iso_to_hex)
+
+        try:
+            tmp_path = WORLD_GEOJSON_CACHE_PATH + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(raw)
+            os.replace(tmp_path, WORLD_GEOJSON_CACHE_PATH)
+        except OSError:
+            pass  # Read-only deploys simply download again on the next cold start.
+    return world_geojson, feature_shapes(world_geojson), hashlib.sha1(raw).hexdigest()
+
+
+def feature_shapes(world_geojson):
+    """Converts each feature's polygons to ring arrays plus a [min_lon, min_lat, max_lon, max_lat] bounding-box table."""
+    bboxes, shapes = [], []
+    for feature in world_geojson["features"]:
+        geometry = feature["geometry"] or {}
+        if geometry.get("type") == "Polygon":
+            polygons = [geometry["coordinates"]]
+        elif geometry.get("type") == "MultiPolygon":
+            polygons = geometry["coordinates"]
+        else:
+            polygons = []
+        rings = [[np.asarray(ring, dtype=float) for ring in polygon if ring] for polygon in polygons if polygon and polygon[0]]
+        if rings:
+            outer = np.concatenate([polygon[0] for polygon in rings])
+            bboxes.append([*outer.min(axis=0), *outer.max(axis=0)])
+        else:
+            bboxes.append([np.nan] * 4)  # No click falls inside an all-NaN box.
+        shapes.append(rings)
+    return np.array(bboxes), shapes
+
+
+def point_in_ring(lon, lat, ring):
+    """Even-odd ray casting test of a point against one polygon ring given as an (N, 2) lon/lat array."""
+    x, y = ring[:, 0], ring[:, 1]
+    x_next, y_next = np.roll(x, -1), np.roll(y, -1)
+    spans = (y > lat) != (y_next > lat)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_cross = x + (lat - y) * (x_next - x) / (y_next - y)
+    return np.count_nonzero(spans & (lon < x_cross)) % 2 == 1
+
+
+def feature_at(world_geojson, world_shapes, lat, lon):
+    """Returns the GeoJSON feature whose polygon contains the clicked point, or None (e.g. open sea)."""
+    bboxes, shapes = world_shapes
+    lon = (lon + 180) % 360 - 180  # Leaflet reports longitudes past +/-180 once the map is panned across the antimeridian.
+    candidates = np.flatnonzero(
+        (bboxes[:, 0] <= lon) & (lon <= bboxes[:, 2]) & (bboxes[:, 1] <= lat) & (lat <= bboxes[:, 3])
+    )
+    for i in candidates:
+        for outer, *holes in shapes[i]:
+            if point_in_ring(lon, lat, outer) and not any(point_in_ring(lon, lat, hole) for hole in holes):
+                return world_geojson["features"][i]
+    return None
+
+
+def build_map(world_geojson):
+    """Builds the folium map with the colored, hoverable country layer."""
+    # Canvas rendering draws every country polygon into one <canvas> instead of one SVG <path> node per feature.
+    m = folium.Map(location=[10, 0], zoom_start=2, tiles="OpenStreetMap", control_scale=True, prefer_canvas=True) 
+
+    def style_function(feature):
+        return {
+            'fillColor': feature['properties']['fill_color'],
+            'color': 'black', 
+            'weight': 0.5,
+            'fillOpacity': 0.6
+        }
+
+    if world_geojson:
+        folium.GeoJson(
+            world_geojson,
+            name='Color and Click Layer',
+            style_function=style_function, 
+            # Hover highlight set to a dark color to contrast with the light CSS border
+            highlight_function=lambda x: {
+                'weight': 5,          
+                'color': "#00000062",    
+                'fillOpacity': 0.6
+            }, 
+            tooltip=folium.features.GeoJsonTooltip(fields=['name'], aliases=['Country Name:']),
+        ).add_to(m)
+    return m
+
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def view_only_map_html(geojson_version, _world_geojson):
+    """Renders the map to a standalone HTML page; unlike a Map object, the string can be reused across reruns."""
+    return build_map(_world_geojson).get_root().render()
+
+
+# Caches derived from the cleaned data take it as an unhashed `_` argument and are keyed on the data_version
+# load_data returns alongside it (plus whatever selects the slice). Cached frames are shared across reruns: don't mutate them.
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def year_index(data_version, _df):
+    """Groups the cleaned data by YEAR into slices indexed by ISO3."""
+    return {year: group.set_index("ISO3", drop=False) for year, group in _df.groupby("YEAR", sort=False)}
+
+
+@st.cache_resource(show_spinner=False, max_entries=3)  # One entry per key column: ISO3, COUNTRY and CANON_ID.
+def country_index(data_version, _df, column):
+    """Splits the cleaned data into per-country frames keyed by `column`, each stably sorted by YEAR."""
+    ordered = _df.sort_values("YEAR", kind="stable")
+    return {key: group for key, group in ordered.groupby(column, sort=False, observed=True)}
+
+
+def lookup_year_row(year_df, selected_id):
+    """Returns the first row of a year slice matching an ISO3 code or country name, or None."""
+    if selected_id in year_df.index:
+        return year_df.loc[[selected_id]].iloc[0]
+    name_match = year_df[year_df["COUNTRY"] == selected_id]
+    return None if name_match.empty else name_match.iloc[0]
 
 
 # -----------------------------
@@ -199,9 +452,14 @@ def load_data():
 
 def format_value(value, units="", precision=3, is_currency=False):
     """Helper function to format values safely, with explicit missing data message and KPI color."""
-    if pd.isna(value) or value is None:
+    if value is None or pd.isna(value):
         return "<span style='color: #FF6347;'>**Data Not Available**</span>"
-    
+    return format_known_value(float(value), units, precision, is_currency)
+
+
+@functools.lru_cache(maxsize=4096)
+def format_known_value(value, units, precision, is_currency):
+    """Formats a non-missing value for format_value (NaN never matches a cached key, so the caller handles it)."""
     if is_currency:
         prefix = '$'
         if abs(value) >= 1000:
@@ -219,64 +477,173 @@ def format_value(value, units="", precision=3, is_currency=False):
     return f"<span style='color: {KPI_VALUE_COLOR};'>{prefix}{value_str}</span> {units}"
 
 
+NARRATIVE_SECTIONS = collections.OrderedDict([
+    ("Development & Economic Stability", ["HDI", "GDP_PER_CAPITA", "GINI_INDEX"]),
+    ("Population Structure & Demographics", ["TOTAL_POPULATION", "MEDIAN_AGE_EST", "POPULATION_DENSITY", "MALE_POPULATION", "FEMALE_POPULATION"]),
+    ("Health Outcomes & Environmental Risk", ["LIFE_EXPECTANCY", "HEALTH_INSURANCE", "PM25"]),
+    ("Vital Statistics & Pandemic Impact", ["BIRTHS", "DEATHS", "COVID_DEATHS", "COVID_CASES"]),
+])
+
+
+def narrative_item(indicator):
+    """Resolves the static parts of one narrative line: (indicator, display name, unit, precision, is_currency, explanation)."""
+    detail = ALL_INDICATOR_DETAILS.get(indicator, {})
+    explanation = INDICATOR_CONTEXT.get(indicator, "")
+    if explanation:
+        explanation += f" (Unit: {detail.get('unit', 'No Unit')})"
+    return (
+        indicator,
+        detail.get("display", indicator.replace('_', ' ').title()),
+        detail.get("unit", ""),
+        detail.get("precision", 3),
+        detail.get("currency", False),
+        explanation,
+    )
+
+
+# Resolved once at import, so building a narrative only reads values from the row and formats them.
+NARRATIVE_ITEMS = [
+    (f"#### {section_title}\n", [narrative_item(indicator) for indicator in indicators])
+    for section_title, indicators in NARRATIVE_SECTIONS.items()
+]
+
+
 def create_data_narrative(row, year):
     """Creates a comprehensive, human-readable narrative text block with detailed explanations."""
     if row.empty or row['COUNTRY'] is None:
         return "No comprehensive data narrative available."
 
     country_name = row['COUNTRY']
-    text = f"### 📊 Data Snapshot: {country_name} ({year})\n\n"
-    text += "This section provides a detailed breakdown of all available indicators for the selected country and year, with explanations for easy understanding.\n\n"
-    
-    sections = collections.OrderedDict([
-        ("Development & Economic Stability", ["HDI", "GDP_PER_CAPITA", "GINI_INDEX"]),
-        ("Population Structure & Demographics", ["TOTAL_POPULATION", "MEDIAN_AGE_EST", "POPULATION_DENSITY", "MALE_POPULATION", "FEMALE_POPULATION"]),
-        ("Health Outcomes & Environmental Risk", ["LIFE_EXPECTANCY", "HEALTH_INSURANCE", "PM25"]),
-        ("Vital Statistics & Pandemic Impact", ["BIRTHS", "DEATHS", "COVID_DEATHS", "COVID_CASES"]),
-    ])
+    values = row.to_dict()  # One conversion up front; the per-indicator lookups below are then plain dict gets.
+    # Fragments are collected in a list and joined once rather than re-copying a growing string on every +=.
+    parts = [f"### 📊 Data Snapshot: {country_name} ({year})\n\n"]
+    parts.append("This section provides a detailed breakdown of all available indicators for the selected country and year, with explanations for easy understanding.\n\n")
     
-    for section_title, indicators in sections.items():
-        text += f"#### {section_title}\n"
-        for indicator in indicators:
-            detail = ALL_INDICATOR_DETAILS.get(indicator, {})
-            display_name = detail.get("display", indicator.replace('_', ' ').title())
-            
+    for section_heading, items in NARRATIVE_ITEMS:
+        parts.append(section_heading)
+        for indicator, display_name, units, precision, is_currency, explanation in items:
             if indicator == "MEDIAN_AGE_EST":
-                 value = row.get('MEDIAN_AGE_EST', row.get('MEDIAN_AGE_MID', np.nan))
+                 value = values.get('MEDIAN_AGE_EST', values.get('MEDIAN_AGE_MID', np.nan))
             else:
-                 value = row.get(indicator, np.nan)
-
-            formatted = format_value(
-                value, 
-                units=detail.get("unit", ""), 
-                precision=detail.get("precision", 3), 
-                is_currency=detail.get("currency", False)
-            ).replace(f"</span> {detail.get('unit', '')}", f"</span>")
-
-            context = ""
-            unit_desc = f" (Unit: {detail.get('unit', 'No Unit')})"
-            if indicator == "HDI": context = "The **Human Development Index (HDI)** measures a country's average achievement in three basic dimensions of human development: a long and healthy life, knowledge, and a decent standard of living." + unit_desc
-            elif indicator == "GDP_PER_CAPITA": context = "The **Gross Domestic Product (GDP) per Capita** is the national economic output divided by the total population, indicating average economic prosperity." + unit_desc
-            elif indicator == "GINI_INDEX": context = "The **Gini Index** measures income inequality, where 0% represents perfect equality and 100% represents perfect inequality." + unit_desc
-            elif indicator == "TOTAL_POPULATION": context = "The total number of people living in the country (reported in Millions)." + unit_desc
-            elif indicator == "POPULATION_DENSITY": context = "The average number of people per square kilometer, showing how crowded the country is." + unit_desc
-            elif indicator == "MEDIAN_AGE_EST": context = "The age that divides the population into two halves. A lower median age suggests a younger population." + unit_desc
-            elif indicator == "LIFE_EXPECTANCY": context = "The average number of years a person is expected to live based on current death rates." + unit_desc
-            elif indicator == "HEALTH_INSURANCE": context = "The percentage of the total population covered by some form of health insurance." + unit_desc
-            elif indicator == "PM25": context = "The concentration of fine particulate matter in the air, a key indicator of environmental health risk." + unit_desc
-            elif indicator == "BIRTHS": context = "The total number of births during the year (reported in thousands, K)." + unit_desc
-            elif indicator == "DEATHS": context = "The total number of deaths during the year (reported in thousands, K)." + unit_desc
-            elif indicator == "COVID_DEATHS": context = "The cumulative total of COVID-19 deaths per million people up to this year." + unit_desc
-            elif indicator == "COVID_CASES": context = "The cumulative total of confirmed COVID-19 cases per million people up to this year." + unit_desc
-            
+                 value = values.get(indicator, np.nan)
+
+            formatted = format_value(value, units=units, precision=precision, is_currency=is_currency)
+            parts.append(f"* **{display_name}:** {formatted}\n  > *Explanation:* {explanation}\n")
+        parts.append("\n")
+    
+    return "".join(parts)
+
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def narrative_for(data_version, _df, selected_id, year):
+    """Returns the data narrative for a selection in a given year, or None when it has no row for that year."""
+    year_df = year_index(data_version, _df).get(year)
+    latest_row = None if year_df is None else lookup_year_row(year_df, selected_id)
+    return None if latest_row is None else create_data_narrative(latest_row, year)
+
+
+def indicator_grid(subplot_titles):
+    """Creates the 3x2 subplot grid shared by the detail and comparison trend panels."""
+    return make_subplots(rows=3, cols=2, subplot_titles=subplot_titles, vertical_spacing=0.1)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def trend_figure(data_version, _recent_df, selected_id, start_year):
+    """Builds the detail-view trend panel: one subplot per chart indicator, sent to the browser as a single figure."""
+    fig_line_trend = indicator_grid(list(CHART_INDICATORS))
+    # Traces take plain arrays, pulled out of the frame once, so Plotly does no per-trace DataFrame handling.
+    years = _recent_df["YEAR"].to_numpy()
+    
+    for i, (label, col) in enumerate(CHART_INDICATORS.items()):
+        fig_line_trend.add_trace(
+            go.Scatter(
+                x=years,
+                y=_recent_df[col].to_numpy(),
+                mode="lines+markers",
+                name=label,
+                line=dict(color=INDICATOR_COLORS.get(col, '#666666')),
+                hovertemplate=f"YEAR=%{{x}}<br>{col}=%{{y}}<extra></extra>"
+            ),
+            row=i // 2 + 1, col=i % 2 + 1
+        )
+    
+    fig_line_trend.update_layout(
+        height=900, 
+        template="plotly_dark", 
+        margin=dict(t=40, b=10, l=10, r=10),
+        showlegend=False 
+    )
+    return fig_line_trend
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def comparison_trend_figure(data_version, _recent_comp_df, comparison_ids, start_year, chart_type):
+    """Builds the comparison trend panel: one subplot per chart indicator, one color and legend entry per country."""
+    is_line = chart_type == "Line Chart (Trend Focus)"
+    title_prefix = "Trend" if is_line else "Trend Magnitude"
+    fig_comp = indicator_grid([f"{title_prefix}: {label}" for label in CHART_INDICATORS])
+
+    # One split by country (in order of appearance) into plain arrays; each trace then only applies a NaN mask,
+    # instead of re-filtering the frame per indicator and per country.
+    by_country = [
+        (country, country_df["YEAR"].to_numpy(), {col: country_df[col].to_numpy() for col in CHART_INDICATORS.values()})
+        for country, country_df in _recent_comp_df.groupby("COUNTRY", sort=False, observed=True)
+    ]
+    palette = px.colors.qualitative.Plotly
+    legend_shown = set()
+
+    for i, (label, col) in enumerate(CHART_INDICATORS.items()):
+        for j, (country, years, values) in enumerate(by_country):
+            has_value = ~np.isnan(values[col])
+            if not has_value.any():
+                continue
             
-            text += f"* **{display_name}:** {formatted} {detail.get('unit', '')}\n  > *Explanation:* {context}\n"
-        text += "\n"
+            trace_style = dict(
+                x=years[has_value],
+                y=values[col][has_value],
+                name=country,
+                legendgroup=country,
+                showlegend=country not in legend_shown,
+                marker=dict(color=palette[j % len(palette)]),
+                hovertemplate=f"COUNTRY={country}<br>YEAR=%{{x}}<br>{col}=%{{y:.2f}}<extra></extra>"
+            )
+            trace = go.Scatter(mode="lines+markers", **trace_style) if is_line else go.Bar(**trace_style)
+            fig_comp.add_trace(trace, row=i // 2 + 1, col=i % 2 + 1)
+            legend_shown.add(country)
     
-    return text.replace("K K", "K").replace("M M", "M")
+    fig_comp.update_layout(
+        height=1050, 
+        template="plotly_dark", 
+        barmode='group',
+        margin=dict(t=60, b=10, l=10, r=10),
+        legend=dict(orientation="h", yanchor="bottom", y=1.03, xanchor="right", x=1)
+    )
+    return fig_comp
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def latest_bar_figure(data_version, _plot_df, comparison_ids, year, col, label):
+    """Builds one latest-year comparison bar chart."""
+    fig_bar = px.bar(
+        _plot_df,
+        x="COUNTRY",
+        y=col,
+        title=f"{label} Value in {year}",
+        color=col, 
+        color_continuous_scale=px.colors.sequential.Plasma, 
+        hover_data={col: ':.2f'} 
+    )
+
+    fig_bar.update_layout(
+        height=350, 
+        template="plotly_dark", 
+        margin=dict(t=40, b=10, l=10, r=10),
+        xaxis={'categoryorder':'total descending'} 
+    )
+    return fig_bar
 
 
-def draw_country_details(df, selected_id, year):
+def draw_country_details(df, data_version, selected_id, year):
     """Renders the detailed KPI and chart view for a selected country."""
 
     st.markdown("---")
@@ -284,10 +651,8 @@ def draw_country_details(df, selected_id, year):
     
     is_name_id = isinstance(selected_id, str) and "Proxy" in selected_id
 
-    if is_name_id:
-        country_df = df[df["COUNTRY"] == selected_id].sort_values("YEAR")
-    else:
-        country_df = df[df["ISO3"] == selected_id].sort_values("YEAR")
+    key_column = "COUNTRY" if is_name_id else "ISO3"
+    country_df = country_index(data_version, df, key_column).get(selected_id, df.iloc[0:0])
 
     if country_df.empty:
         st.info("No detailed data available for this selection.")
@@ -296,13 +661,18 @@ def draw_country_details(df, selected_id, year):
     country_name = country_df.iloc[0]["COUNTRY"]
     st.subheader(country_name)
     
-    latest_row_check = country_df[country_df["YEAR"] == year]
+    # country_df is sorted by YEAR, so the selected year's rows and the trend range below are contiguous slices
+    # found by binary search on the year column rather than boolean masks over the frame.
+    country_years = country_df["YEAR"].to_numpy()
+    year_start, year_end = np.searchsorted(country_years, [year, year + 1])
+    latest_row_check = country_df.iloc[year_start:year_end]
     
     if latest_row_check.empty:
         st.warning(f"No KPI data for {country_name} for the year {year} is available.")
         return
 
-    latest = latest_row_check.iloc[0] 
+    # A plain dict: the KPI loop below does a dozen scalar lookups, which are cheaper on a dict than on a Series.
+    latest = latest_row_check.iloc[0].to_dict()
     
     # --- 1. Display ALL Key Performance Indicators (KPIs) ---
     st.markdown(f"**Data Snapshot for {year}:**")
@@ -354,30 +724,11 @@ def draw_country_details(df, selected_id, year):
         n_years = len(years_available)
 
     recent_years = years_available[:n_years]
-    recent_df = country_df[country_df["YEAR"].isin(recent_years)]
-
-    cols_chart = st.columns(2)
-
-    for i, (label, col) in enumerate(CHART_INDICATORS.items()):
-        
-        fig_line_trend = px.line(
-            recent_df,
-            x="YEAR",
-            y=col,
-            markers=True,
-            title=label,
-            color_discrete_sequence=[INDICATOR_COLORS.get(col, '#666666')]
-        )
-        
-        fig_line_trend.update_layout(
-            height=300, 
-            template="plotly_dark", 
-            margin=dict(t=40, b=10, l=10, r=10),
-            showlegend=False 
-        )
+    # The trend range is the country's newest years: a contiguous tail of country_df.
+    recent_df = country_df.iloc[np.searchsorted(country_years, recent_years[-1]):]
 
-        with cols_chart[i % 2]:
-            st.plotly_chart(fig_line_trend, use_container_width=True)
+    fig_line_trend = trend_figure(data_version, recent_df, selected_id, recent_years[-1])
+    st.plotly_chart(fig_line_trend, use_container_width=True)
 
 
 # -----------------------------
@@ -387,12 +738,12 @@ def draw_country_details(df, selected_id, year):
 FULL_SNAPSHOT_CONTENT = None 
 
 try:
-    df, world_geojson, mismatch_map, iso_to_hex = load_data() 
-    years = sorted(df["YEAR"].unique())
-
-    country_list = sorted(df["COUNTRY"].unique())
-    country_name_to_iso = dict(zip(df[df['ISO3'].str.len() > 0]["COUNTRY"], df[df['ISO3'].str.len() > 0]["ISO3"]))
-    country_name_to_iso["Americas (USA Data Proxy)"] = "Americas (USA Data Proxy)"
+    df, mismatch_map, iso_to_hex, iso_set, country_list, country_name_to_iso, years, data_version = load_data() 
+    try:
+        world_geojson, world_shapes, geojson_version = load_world_geojson(iso_to_hex)
+    except Exception as e:
+        st.warning(f"Failed to load world GeoJSON for map coloring: {e}")
+        world_geojson, world_shapes, geojson_version = None, None, None
 
     if 'selected_id' not in st.session_state:
         st.session_state.selected_id = None 
@@ -422,58 +773,39 @@ try:
             key='country_select_box',
             on_change=lambda: select_box_callback(country_name_to_iso)
         )
+        map_click_select = st.checkbox(
+            "Click-to-select on map",
+            value=True,
+            key="map_click_select",
+            help="Turn off for a view-only map that pans and zooms without rerunning the dashboard."
+        )
         current_id = None
         if selected_country_name_fallback:
             current_id = country_name_to_iso.get(selected_country_name_fallback, selected_country_name_fallback)
             st.session_state.selected_id = current_id
     
-    if st.session_state.selected_id:
-        country_df_check = df[(df["ISO3"] == st.session_state.selected_id) | (df["COUNTRY"] == st.session_state.selected_id)]
-        latest_row_check = country_df_check[country_df_check["YEAR"] == year]
-        if not latest_row_check.empty:
-            FULL_SNAPSHOT_CONTENT = create_data_narrative(latest_row_check.iloc[0], year)
-
 
     # ----------------------------------------------------
     # 2. Render Folium Map & Capture Click 
     # ----------------------------------------------------
 
-    m = folium.Map(location=[10, 0], zoom_start=2, tiles="OpenStreetMap", control_scale=True) 
-
-    def style_function(feature):
-        country_iso = feature['id']
-        hex_color = iso_to_hex.get(country_iso, '#666666') 
-        
-        return {
-            'fillColor': hex_color,
-            'color': 'black', 
-            'weight': 0.5,
-            'fillOpacity': 0.6
-        }
-
-    if world_geojson:
-        folium.GeoJson(
-            world_geojson,
-            name='Color and Click Layer',
-            style_function=style_function, 
-            # Hover highlight set to a dark color to contrast with the light CSS border
-            highlight_function=lambda x: {
-                'weight': 5,          
-                'color': "#00000062",    
-                'fillOpacity': 0.6
-            }, 
-            tooltip=folium.features.GeoJsonTooltip(fields=['name'], aliases=['Country Name:']),
-        ).add_to(m)
-
-
-    map_data = st_folium(
-        m, 
-        height=500, 
-        width='100%', 
-        use_container_width=True,
-        key="folium_map_iso_capture", 
-        returned_objects=["last_active_feature", "last_clicked"] 
-    )
+    if map_click_select:
+        map_data = st_folium(
+            build_map(world_geojson),  # st_folium rewrites ids inside the Map it is given, so each call needs a fresh one.
+            height=500, 
+            width='100%', 
+            use_container_width=True,
+            key="folium_map_iso_capture", 
+            returned_objects=["last_active_feature", "last_clicked"] 
+        )
+    else:
+        # View-only: the map is embedded as static HTML, so panning and zooming never round-trip through Python.
+        view_only_html = view_only_map_html(geojson_version, world_geojson)
+        if hasattr(st, "iframe"):
+            st.iframe(view_only_html, height=500)
+        else:  # Streamlit releases that predate st.iframe.
+            components.html(view_only_html, height=500)
+        map_data = None
 
     # --- MAP CLICK CAPTURE LOGIC ---
     clicked_id = None
@@ -483,37 +815,34 @@ try:
         
         if country_name_from_map and country_name_from_map in mismatch_map:
             clicked_id = mismatch_map[country_name_from_map]
-        elif iso_from_feature in df['ISO3'].values:
+        elif iso_from_feature in iso_set:
             clicked_id = iso_from_feature
             
-    if clicked_id is None and map_data and map_data.get("last_clicked"):
+    if clicked_id is None and world_geojson and map_data and map_data.get("last_clicked"):
         lat = map_data["last_clicked"]["lat"]
         lon = map_data["last_clicked"]["lng"]
-        coordinates = [(lat, lon)]
-        try:
-            results = reverse_geocode.search(coordinates)
-            country_name_from_click = results[0]['country']
-            
-            if country_name_from_click in mismatch_map:
-                clicked_id = mismatch_map[country_name_from_click]
-            else:
-                clicked_row = df[df["COUNTRY"].str.contains(country_name_from_click, case=False, na=False)]
-                if not clicked_row.empty: clicked_id = clicked_row.iloc[0]["ISO3"] if clicked_row.iloc[0]["ISO3"] else clicked_row.iloc[0]["COUNTRY"]
-        except Exception: pass 
+        clicked_feature = feature_at(world_geojson, world_shapes, lat, lon)
+        country_name_from_click = clicked_feature["properties"].get("name") if clicked_feature else None
+        
+        if country_name_from_click in mismatch_map:
+            clicked_id = mismatch_map[country_name_from_click]
+        elif country_name_from_click:
+            clicked_row = df[df["COUNTRY"].str.contains(country_name_from_click, case=False, na=False, regex=False)]
+            if not clicked_row.empty: clicked_id = clicked_row.iloc[0]["ISO3"] if pd.notna(clicked_row.iloc[0]["ISO3"]) else clicked_row.iloc[0]["COUNTRY"]
         
     if clicked_id:
         st.session_state.selected_id = clicked_id
-        country_df_check = df[(df["ISO3"] == clicked_id) | (df["COUNTRY"] == clicked_id)]
-        latest_row_check = country_df_check[country_df_check["YEAR"] == year]
-        if not latest_row_check.empty:
-            FULL_SNAPSHOT_CONTENT = create_data_narrative(latest_row_check.iloc[0], year)
+
+    # Resolved once, after both the select box and a map click have had their say on the selection.
+    if st.session_state.selected_id:
+        FULL_SNAPSHOT_CONTENT = narrative_for(data_version, df, st.session_state.selected_id, year)
 
 
     # -----------------------------
     # 6. Country Details Section
     # -----------------------------
     if st.session_state.selected_id:
-        draw_country_details(df, st.session_state.selected_id, year)
+        draw_country_details(df, data_version, st.session_state.selected_id, year)
     else:
         st.info("👆 Click any country on the map or use the Select Box above to view detailed insights.")
 
@@ -539,16 +868,23 @@ try:
         for name in selected_country_names:
             comparison_ids.append(country_name_to_iso.get(name, name))
         
-        is_iso = df['ISO3'].isin(comparison_ids)
-        is_name = df['COUNTRY'].isin(comparison_ids)
-
-        comparison_df = df[is_iso | is_name].sort_values("YEAR")
+        # Two names can share an ISO3 code, so ids are de-duplicated; file order is restored before the YEAR sort.
+        by_id = country_index(data_version, df, "CANON_ID")
+        matched = [by_id[cid] for cid in dict.fromkeys(comparison_ids) if cid in by_id]
+        if matched:
+            comparison_df = pd.concat(matched).sort_index().sort_values("YEAR")
+        else:
+            comparison_df = df.iloc[0:0]
         
         if not comparison_df.empty:
             
-            latest_comparison_df = comparison_df[comparison_df["YEAR"] == year].copy()
+            comparison_years = comparison_df["YEAR"].to_numpy()
+            year_start, year_end = np.searchsorted(comparison_years, [year, year + 1])
+            latest_comparison_df = comparison_df.iloc[year_start:year_end]
+            # Missing-value masks for every chart column in one pass; the coverage metric and each bar chart index into it.
+            latest_has_value = latest_comparison_df[list(CHART_INDICATORS.values())].notna()
             
-            num_countries_with_data = latest_comparison_df.dropna(subset=['HDI', 'GDP_PER_CAPITA'], how='all').shape[0]
+            num_countries_with_data = int(latest_has_value[['HDI', 'GDP_PER_CAPITA']].any(axis=1).sum())
 
             with col_metric:
                 st.metric(
@@ -581,42 +917,12 @@ try:
             else: n_years_comp = len(years_available_comp)
 
             recent_years_comp = years_available_comp[:n_years_comp]
-            recent_comp_df = comparison_df[comparison_df["YEAR"].isin(recent_years_comp)]
-
-            cols_line = st.columns(2)
+            recent_comp_df = comparison_df.iloc[np.searchsorted(comparison_years, recent_years_comp[-1]):]
 
-            for i, (label, col) in enumerate(CHART_INDICATORS.items()):
-                
-                if chart_type == "Line Chart (Trend Focus)":
-                    fig_comp = px.line(
-                        recent_comp_df.dropna(subset=[col]),
-                        x="YEAR",
-                        y=col,
-                        color="COUNTRY", 
-                        markers=True,
-                        title=f"Trend: {label}",
-                        hover_data={"COUNTRY": True, "YEAR": True, col: ":.2f"}
-                    )
-                else:
-                    fig_comp = px.bar(
-                        recent_comp_df.dropna(subset=[col]),
-                        x="YEAR",
-                        y=col,
-                        color="COUNTRY", 
-                        barmode='group',
-                        title=f"Trend Magnitude: {label}",
-                        hover_data={"COUNTRY": True, "YEAR": True, col: ":.2f"}
-                    )
-                
-                fig_comp.update_layout(
-                    height=350, 
-                    template="plotly_dark", 
-                    margin=dict(t=40, b=10, l=10, r=10),
-                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-                )
-
-                with cols_line[i % 2]:
-                    st.plotly_chart(fig_comp, use_container_width=True)
+            fig_comp = comparison_trend_figure(
+                data_version, recent_comp_df, tuple(sorted(comparison_ids)), recent_years_comp[-1], chart_type
+            )
+            st.plotly_chart(fig_comp, use_container_width=True)
 
 
             # --- 7.2: Latest Year Comparison (Magnitude Comparison with Gradient) ---
@@ -627,29 +933,14 @@ try:
                 
                 for i, (label, col) in enumerate(CHART_INDICATORS.items()):
                     
-                    plot_df = latest_comparison_df.dropna(subset=[col]).sort_values(by=col, ascending=False)
+                    plot_df = latest_comparison_df[latest_has_value[col]].sort_values(by=col, ascending=False)
                     
                     if plot_df.empty:
                         with cols_bar[i % 2]:
                              st.info(f"Not enough data for {label} comparison in {year}.")
                         continue
                     
-                    fig_bar = px.bar(
-                        plot_df,
-                        x="COUNTRY",
-                        y=col,
-                        title=f"{label} Value in {year}",
-                        color=col, 
-                        color_continuous_scale=px.colors.sequential.Plasma, 
-                        hover_data={col: ':.2f'} 
-                    )
-
-                    fig_bar.update_layout(
-                        height=350, 
-                        template="plotly_dark", 
-                        margin=dict(t=40, b=10, l=10, r=10),
-                        xaxis={'categoryorder':'total descending'} 
-                    )
+                    fig_bar = latest_bar_figure(data_version, plot_df, tuple(sorted(comparison_ids)), year, col, label)
                     
                     with cols_bar[i % 2]:
                         st.plotly_chart(fig_bar, use_container_width=True)